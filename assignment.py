@@ -1,9 +1,12 @@
 import streamlit as st
 import requests
-import pandas as pd
-import plotly.graph_objects as go
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import orjson
 import os
+import re
 import time
 
 # Page configuration
@@ -135,94 +138,200 @@ st.markdown("""
 # Get API key from environment variables
 API_KEY = os.getenv("TWELVE_DATA_API_KEY", "demo")
 
+# Seconds a finished analysis is re-shown on unrelated reruns
+ANALYSIS_TTL = 60
+
+
+@st.cache_resource
+def create_http_session():
+    """Create a pooled HTTP session shared across reruns"""
+    session = requests.Session()
+    # Read timeouts are not retried so they still surface as Timeout
+    retries = Retry(total=3,
+                    connect=3,
+                    read=False,
+                    status=3,
+                    backoff_factor=0.3,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    raise_on_status=False)
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retries))
+    return session
+
+
+_SESSION = create_http_session()
+
+
+# Valid stock symbols: up to 10 letters, digits, or periods, with at least
+# one letter or digit
+_SYMBOL_RE = re.compile(r"\A(?=.*[A-Za-z0-9])[A-Za-z0-9.]{1,10}\Z")
+
 
 def validate_stock_symbol(symbol):
     """Validate stock symbol format"""
     if not symbol:
         return False, "Please enter a stock symbol"
 
-    if not symbol.replace(".", "").isalnum():
-        return False, "Stock symbol should only contain letters, numbers, and periods"
+    if _SYMBOL_RE.match(symbol):
+        return True, ""
 
-    if len(symbol) > 10:
+    if len(symbol) > 10 and symbol.replace(".", "").isalnum():
         return False, "Stock symbol should be 10 characters or less"
 
-    return True, ""
+    return False, "Stock symbol should only contain letters, numbers, and periods"
 
 
-def fetch_stock_data(symbol, interval="1day", outputsize=7):
-    """Fetch stock data from Twelve Data API"""
-    try:
-        # API endpoint for time series data
-        url = "https://api.twelvedata.com/time_series"
-
-        params = {
-            "symbol": symbol.upper(),
-            "interval": interval,
-            "outputsize": outputsize,
-            "apikey": API_KEY
-        }
+class TwelveDataError(Exception):
+    """Raised when the Twelve Data API rejects or fails a request"""
+
+
+class PartialBatchError(TwelveDataError):
+    """Raised when some symbols in a batch failed; carries every result"""
+
+    def __init__(self, results):
+        super().__init__("Some symbols in the batch failed")
+        self.results = results
 
-        response = requests.get(url, params=params, timeout=10)
 
-        if response.status_code == 200:
-            data = response.json()
+@st.cache_data(ttl=60, show_spinner=False)
+def request_time_series(symbols, interval, outputsize):
+    """Request time series for several symbols in one Twelve Data API call
 
-            # Check for API errors
-            if "status" in data and data["status"] == "error":
-                return None, data.get("message", "Unknown API error")
+    Any failure, including an error for a single symbol in a batch, raises
+    instead of returning, so only fully successful responses are cached.
+    """
+    # API endpoint for time series data
+    url = "https://api.twelvedata.com/time_series"
 
-            if "values" not in data:
-                return None, "No data available for this symbol"
+    params = {
+        "symbol": ",".join(symbols),
+        "interval": interval,
+        "outputsize": outputsize,
+        "apikey": API_KEY
+    }
+
+    response = _SESSION.get(url, params=params, timeout=10)
+
+    if response.status_code != 200:
+        raise TwelveDataError(
+            f"API request failed with status code: {response.status_code}")
+
+    data = orjson.loads(response.content)
+
+    # Check for API errors affecting the whole request
+    if "status" in data and data["status"] == "error":
+        raise TwelveDataError(data.get("message", "Unknown API error"))
+
+    # Multi-symbol responses are keyed by symbol
+    if len(symbols) == 1:
+        if "values" not in data:
+            raise TwelveDataError("No data available for this symbol")
+        data = {symbols[0]: data}
+
+    results = {}
+    for symbol in symbols:
+        symbol_data = data.get(symbol)
 
-            return data, None
+        if symbol_data is None or "values" not in symbol_data:
+            if symbol_data and symbol_data.get("status") == "error":
+                results[symbol] = (None, symbol_data.get(
+                    "message", "Unknown API error"))
+            else:
+                results[symbol] = (None, "No data available for this symbol")
         else:
-            return None, f"API request failed with status code: {response.status_code}"
+            # Keep only the values; meta is unused and would be
+            # pickled into the cache and hashed downstream
+            results[symbol] = ({"values": symbol_data["values"]}, None)
+
+    if any(error for _, error in results.values()):
+        raise PartialBatchError(results)
+
+    return results
+
+
+def fetch_stock_data_batch(symbols, interval="1day", outputsize=7):
+    """Fetch stock data for several symbols in one Twelve Data API request
+
+    Returns a dict mapping each upper-cased symbol to a (data, error) tuple.
+    """
+    # Upper-case and de-duplicate in order so the response shape matches
+    symbols = tuple(dict.fromkeys(symbol.upper() for symbol in symbols))
+
+    def fail(message):
+        return {symbol: (None, message) for symbol in symbols}
 
+    try:
+        return request_time_series(symbols, interval, outputsize)
+    except PartialBatchError as e:
+        return e.results
+    except TwelveDataError as e:
+        return fail(str(e))
     except requests.exceptions.Timeout:
-        return None, "Request timed out. Please try again."
+        return fail("Request timed out. Please try again.")
     except requests.exceptions.RequestException as e:
-        return None, f"Network error: {str(e)}"
+        return fail(f"Network error: {str(e)}")
+    except orjson.JSONDecodeError:
+        return fail("Invalid response received from the API")
     except Exception as e:
-        return None, f"Unexpected error: {str(e)}"
+        return fail(f"Unexpected error: {str(e)}")
 
 
-def get_current_price(symbol):
-    """Fetch current stock price"""
-    try:
-        url = "https://api.twelvedata.com/price"
-        params = {"symbol": symbol.upper(), "apikey": API_KEY}
+def fetch_stock_data(symbol, interval="1day", outputsize=7):
+    """Fetch stock data from Twelve Data API"""
+    return fetch_stock_data_batch((symbol, ), interval,
+                                  outputsize)[symbol.upper()]
 
-        response = requests.get(url, params=params, timeout=10)
 
-        if response.status_code == 200:
-            data = response.json()
+@st.cache_data(ttl=60, show_spinner=False)
+def request_current_price(symbol):
+    """Request the current price; raises on failure so errors are not cached"""
+    url = "https://api.twelvedata.com/price"
+    params = {"symbol": symbol, "apikey": API_KEY}
 
-            if "status" in data and data["status"] == "error":
-                return None, data.get("message", "Unknown API error")
+    response = _SESSION.get(url, params=params, timeout=10)
 
-            if "price" in data:
-                return float(data["price"]), None
-            else:
-                return None, "Price data not available"
-        else:
-            return None, f"API request failed with status code: {response.status_code}"
+    if response.status_code != 200:
+        raise TwelveDataError(
+            f"API request failed with status code: {response.status_code}")
+
+    data = orjson.loads(response.content)
+
+    if "status" in data and data["status"] == "error":
+        raise TwelveDataError(data.get("message", "Unknown API error"))
+
+    if "price" not in data:
+        raise TwelveDataError("Price data not available")
 
+    return float(data["price"])
+
+
+def get_current_price(symbol):
+    """Fetch current stock price"""
+    try:
+        return request_current_price(symbol.upper()), None
+    except TwelveDataError as e:
+        return None, str(e)
+    except orjson.JSONDecodeError:
+        return None, "Invalid response received from the API"
     except Exception as e:
         return None, f"Error fetching current price: {str(e)}"
 
 
 def create_price_chart(df, symbol):
     """Create interactive price chart using Plotly"""
+    # Imported lazily so reruns that never draw a chart skip loading Plotly
+    import plotly.graph_objects as go
+
     fig = go.Figure()
 
-    # Add candlestick chart
+    # Add candlestick chart from the underlying NumPy arrays
     fig.add_trace(
-        go.Candlestick(x=df['datetime'],
-                       open=df['open'],
-                       high=df['high'],
-                       low=df['low'],
-                       close=df['close'],
+        go.Candlestick(x=df['datetime'].to_numpy(),
+                       open=df['open'].to_numpy(),
+                       high=df['high'].to_numpy(),
+                       low=df['low'].to_numpy(),
+                       close=df['close'].to_numpy(),
                        name=symbol.upper()))
 
     # Update layout with dark theme
@@ -236,7 +345,10 @@ def create_price_chart(df, symbol):
         plot_bgcolor='#1a1a1a',
         paper_bgcolor='#1a1a1a',
         font=dict(color='#ffffff', family='monospace'),
-        title_font=dict(size=20, color='#FFC72C')
+        title_font=dict(size=20, color='#FFC72C'),
+        autosize=True,
+        # Keep zoom/pan state across reruns for the same symbol
+        uirevision=symbol.upper()
     )
 
     # Format x-axis
@@ -245,24 +357,37 @@ def create_price_chart(df, symbol):
     return fig
 
 
+@st.cache_data(ttl=300, show_spinner=False)
 def process_stock_data(data):
     """Process API response into DataFrame"""
+    import numpy as np
+    import pandas as pd
+
     try:
         values = data["values"]
 
-        # Convert to DataFrame
-        df = pd.DataFrame(values)
-
-        # Convert data types
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        df['open'] = pd.to_numeric(df['open'])
-        df['high'] = pd.to_numeric(df['high'])
-        df['low'] = pd.to_numeric(df['low'])
-        df['close'] = pd.to_numeric(df['close'])
-        df['volume'] = pd.to_numeric(df['volume'])
-
-        # Sort by date (oldest first)
-        df = df.sort_values('datetime')
+        # Transpose rows into column lists
+        cols = {
+            key: []
+            for key in ('datetime', 'open', 'high', 'low', 'close', 'volume')
+        }
+        for value in values:
+            for key in cols:
+                cols[key].append(value[key])
+
+        # Build DataFrame with typed columns
+        df = pd.DataFrame({
+            'datetime': pd.to_datetime(cols['datetime']),
+            'open': np.asarray(cols['open'], dtype=np.float64),
+            'high': np.asarray(cols['high'], dtype=np.float64),
+            'low': np.asarray(cols['low'], dtype=np.float64),
+            'close': np.asarray(cols['close'], dtype=np.float64),
+            'volume': np.asarray(cols['volume'], dtype=np.int64)
+        })
+
+        # API returns newest first; reverse to oldest first
+        if df['datetime'].iloc[0] > df['datetime'].iloc[-1]:
+            df = df.iloc[::-1].reset_index(drop=True)
 
         return df, None
 
@@ -270,6 +395,105 @@ def process_stock_data(data):
         return None, f"Error processing data: {str(e)}"
 
 
+def display_stock_analysis(stock_symbol, df, current_price, price_error):
+    """Render price metrics, chart, and raw data for an analyzed stock"""
+    # Imported lazily for the raw-data table
+    import pandas as pd
+
+    # Display current price with enhanced styling
+    st.markdown('<div class="metrics-container">', unsafe_allow_html=True)
+
+    if current_price and not price_error:
+        st.metric(
+            label=f"💰 {stock_symbol} Current Price",
+            value=f"${current_price:.2f}",
+            delta=None
+        )
+    else:
+        st.warning("⚠️ Current price not available")
+
+    # Display basic information with enhanced metrics
+    st.markdown("### 📈 Key Metrics")
+    col_info1, col_info2, col_info3 = st.columns(3)
+
+    # Reduce on the underlying arrays to skip pandas dispatch overhead
+    latest_close = df['close'].to_numpy()[-1]
+    week_high = df['high'].to_numpy().max()
+    week_low = df['low'].to_numpy().min()
+
+    with col_info1:
+        st.metric("🔹 Latest Close", f"${latest_close:.2f}")
+
+    with col_info2:
+        st.metric("📊 7-Day High", f"${week_high:.2f}")
+
+    with col_info3:
+        st.metric("📉 7-Day Low", f"${week_low:.2f}")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Create and display chart with enhanced container
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.markdown("### 📊 Interactive Price Chart")
+    fig = create_price_chart(df, stock_symbol)
+    st.plotly_chart(fig, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Display data table
+    with st.expander("View Raw Data"):
+        # Build the formatted display frame in one pass, without a copy
+        price_format = "${:.2f}".format
+        display_df = pd.DataFrame({
+            'Date': df['datetime'].dt.strftime('%Y-%m-%d').to_numpy(),
+            'Open': list(map(price_format, df['open'].to_numpy())),
+            'High': list(map(price_format, df['high'].to_numpy())),
+            'Low': list(map(price_format, df['low'].to_numpy())),
+            'Close': list(map(price_format, df['close'].to_numpy())),
+            'Volume': list(map("{:,}".format, df['volume'].to_numpy()))
+        })
+
+        st.dataframe(display_df, use_container_width=True)
+
+
+def analyze_stock(stock_symbol):
+    """Validate, fetch, and render the analysis for a stock symbol"""
+    # Forget the previous result so a failed analysis never brings it back
+    st.session_state.pop("last_analysis", None)
+
+    # Validate input before any API calls
+    is_valid, error_msg = validate_stock_symbol(stock_symbol)
+    if not is_valid:
+        st.error(error_msg)
+        return
+
+    # Show loading spinner
+    with st.spinner(f"Fetching data for {stock_symbol}..."):
+        # Fetch current price and historical data concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            price_future = executor.submit(get_current_price, stock_symbol)
+            data_future = executor.submit(fetch_stock_data, stock_symbol)
+            current_price, price_error = price_future.result()
+            stock_data, data_error = data_future.result()
+
+        if data_error:
+            st.error(f"Error fetching stock data: {data_error}")
+            return
+
+        if not stock_data:
+            return
+
+        # Process the data
+        df, process_error = process_stock_data(stock_data)
+        if process_error:
+            st.error(process_error)
+            return
+
+        # Remember the result so later reruns can reuse it
+        st.session_state["last_analysis"] = (stock_symbol, time.time(), df,
+                                             current_price, price_error)
+        display_stock_analysis(stock_symbol, df, current_price, price_error)
+
+
 # Main interface with enhanced styling
 st.markdown('<div class="stock-input-section">', unsafe_allow_html=True)
 
@@ -299,94 +523,19 @@ with col1:
 st.markdown('</div>', unsafe_allow_html=True)
 
 with col2:
-    if search_clicked and stock_symbol:
-        # Validate input
-        is_valid, error_msg = validate_stock_symbol(stock_symbol)
-
-        if not is_valid:
-            st.error(error_msg)
-        else:
-            # Show loading spinner
-            with st.spinner(f"Fetching data for {stock_symbol}..."):
-                # Fetch current price
-                current_price, price_error = get_current_price(stock_symbol)
-
-                # Fetch historical data
-                stock_data, data_error = fetch_stock_data(stock_symbol)
-
-                if data_error:
-                    st.error(f"Error fetching stock data: {data_error}")
-                elif stock_data:
-                    # Process the data
-                    df, process_error = process_stock_data(stock_data)
-
-                    if process_error:
-                        st.error(process_error)
-                    else:
-                        # Display current price with enhanced styling
-                        st.markdown('<div class="metrics-container">', unsafe_allow_html=True)
-                        
-                        if current_price and not price_error:
-                            st.metric(
-                                label=f"💰 {stock_symbol} Current Price",
-                                value=f"${current_price:.2f}",
-                                delta=None
-                            )
-                        else:
-                            st.warning("⚠️ Current price not available")
-
-                        # Display basic information with enhanced metrics
-                        st.markdown("### 📈 Key Metrics")
-                        col_info1, col_info2, col_info3 = st.columns(3)
-
-                        with col_info1:
-                            latest_close = df['close'].iloc[-1]
-                            st.metric("🔹 Latest Close", f"${latest_close:.2f}")
-
-                        with col_info2:
-                            week_high = df['high'].max()
-                            st.metric("📊 7-Day High", f"${week_high:.2f}")
-
-                        with col_info3:
-                            week_low = df['low'].min()
-                            st.metric("📉 7-Day Low", f"${week_low:.2f}")
-                        
-                        st.markdown('</div>', unsafe_allow_html=True)
-
-                        # Create and display chart with enhanced container
-                        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-                        st.markdown("### 📊 Interactive Price Chart")
-                        fig = create_price_chart(df, stock_symbol)
-                        st.plotly_chart(fig, use_container_width=True)
-                        st.markdown('</div>', unsafe_allow_html=True)
-
-                        # Display data table
-                        with st.expander("View Raw Data"):
-                            # Format the dataframe for display
-                            display_df = df.copy()
-                            display_df['datetime'] = display_df[
-                                'datetime'].dt.strftime('%Y-%m-%d')
-                            display_df = display_df[[
-                                'datetime', 'open', 'high', 'low', 'close',
-                                'volume'
-                            ]]
-                            display_df.columns = [
-                                'Date', 'Open', 'High', 'Low', 'Close',
-                                'Volume'
-                            ]
-
-                            # Format numeric columns
-                            for col in ['Open', 'High', 'Low', 'Close']:
-                                display_df[col] = display_df[col].apply(
-                                    lambda x: f"${x:.2f}")
-
-                            display_df['Volume'] = display_df['Volume'].apply(
-                                lambda x: f"{x:,}")
-
-                            st.dataframe(display_df, use_container_width=True)
+    last_analysis = st.session_state.get("last_analysis")
 
+    if search_clicked and stock_symbol:
+        analyze_stock(stock_symbol)
     elif search_clicked:
+        st.session_state.pop("last_analysis", None)
         st.warning("Please enter a stock symbol")
+    elif (last_analysis is not None
+          and last_analysis[0] == stock_symbol
+          and time.time() - last_analysis[1] < ANALYSIS_TTL):
+        # Re-render the last analysis while the symbol is unchanged
+        symbol, _, df, current_price, price_error = last_analysis
+        display_stock_analysis(symbol, df, current_price, price_error)
 
 # Enhanced Footer with USC branding
 st.markdown('<div class="footer">', unsafe_allow_html=True)